@@ -2,14 +2,54 @@ import argparse
 import importlib.util
 import json
 import logging
+import logging.handlers
+import mmap
 import os
 import re
 import shutil
 import subprocess
 import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import lru_cache
 
-import nbformat
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Logger shared by the processor and the module-level helpers
+logger = logging.getLogger(__name__)
+
+# Log handler installed by the latest NotebookProcessor, replaced by the next one
+_log_handler = None
+
+#
+# Constants
+#
+
+# Otter changes the working directory while it assigns, so in-process runs
+# must not overlap
+OTTER_LOCK = threading.Lock()
+
+# Folders that never hold notebooks to build; the solutions folder is skipped too
+SKIPPED_FOLDERS = frozenset({".git", ".ipynb_checkpoints", "__pycache__"})
+
+# Patterns for the parts of a question's markdown cell
+TITLE_PATTERN = re.compile(r"^##\s*(.+)", re.MULTILINE)
+QUESTION_TEXT_PATTERN = re.compile(r"^###\s*\*\*(.+)\*\*", re.MULTILINE)
+OPTIONS_PATTERN = re.compile(
+    r"####\s*options\s*(.+?)(?=####|$)", re.DOTALL | re.IGNORECASE
+)
+SOLUTION_PATTERN = re.compile(r"####\s*SOLUTION\s*(.+)", re.IGNORECASE)
+
+# Characters that are not allowed in a Python name, and a leading digit
+INVALID_NAME_PATTERN = re.compile(r"\W|^(?=\d)")
+
+# Cells containing any of these are dropped from student notebooks
+REMOVED_CELL_MARKERS = ("## Submission", "# Save your notebook first,")
 
 
 @dataclass
@@ -22,12 +62,16 @@ class NotebookProcessor:
         solutions_folder (str): The directory where processed notebooks and solutions are stored.
         verbose (bool): Flag for verbose output to the console.
         log (bool): Flag to enable or disable logging.
+        max_workers (int): Number of notebooks to process concurrently. With a single
+            worker, Otter is called in-process when it can be imported; with more,
+            every notebook starts its own `otter` command so that they can overlap.
     """
 
     root_folder: str
     solutions_folder: str = field(init=False)
     verbose: bool = False
     log: bool = True
+    max_workers: int = field(default_factory=lambda: min(8, os.cpu_count() or 1))
 
     def __post_init__(self):
         """
@@ -40,6 +84,9 @@ class NotebookProcessor:
         Raises:
             OSError: If the solutions folder cannot be created due to permissions or other filesystem issues.
         """
+        # Work with absolute paths, which stay valid while Otter changes directory
+        self.root_folder = os.path.abspath(self.root_folder)
+
         # Define the folder to store solutions and ensure it exists
         self.solutions_folder = os.path.join(self.root_folder, "_solutions")
         os.makedirs(
@@ -48,17 +95,26 @@ class NotebookProcessor:
 
         # Configure logging to store log messages in the solutions folder
         log_file_path = os.path.join(self.solutions_folder, "notebook_processor.log")
-        logging.basicConfig(
-            filename=log_file_path,  # Path to the log file
-            level=logging.INFO,  # Log messages at INFO level and above will be recorded
-            format="%(asctime)s - %(levelname)s - %(message)s",  # Log message format: timestamp, level, and message
+        file_handler = logging.FileHandler(log_file_path)
+        file_handler.setFormatter(
+            logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
         )
 
-        # Initialize a global logger for the class
-        global logger
-        logger = logging.getLogger(
-            __name__
-        )  # Create a logger instance specific to this module
+        # Attach the handler to this module's logger rather than the root logger,
+        # buffering records so the file is written in batches; errors flush at once
+        global _log_handler
+        if _log_handler is not None:
+            # Drop only the handler from an earlier instance, leaving any others
+            logger.removeHandler(_log_handler)
+            previous_file_handler = _log_handler.target
+            _log_handler.close()
+            previous_file_handler.close()
+        self.log_handler = logging.handlers.MemoryHandler(
+            capacity=1000, flushLevel=logging.ERROR, target=file_handler
+        )
+        _log_handler = self.log_handler
+        logger.addHandler(self.log_handler)
+        logger.setLevel(logging.INFO)
         self.logger = logger  # Assign the logger instance to the class for use in instance methods
 
     def process_notebooks(self):
@@ -66,7 +122,7 @@ class NotebookProcessor:
         Recursively processes Jupyter notebooks in a given folder and its subfolders.
 
         The function performs the following steps:
-        1. Iterates through all files within the root folder and subfolders.
+        1. Walks the root folder and its subfolders, skipping the solutions folder.
         2. Identifies Jupyter notebooks by checking file extensions (.ipynb).
         3. Checks if each notebook contains assignment configuration metadata.
         4. Processes notebooks that meet the criteria using `otter assign` or other defined steps.
@@ -97,23 +153,77 @@ class NotebookProcessor:
             processor = NotebookProcessor("/path/to/root/folder")
             processor.process_notebooks()
         """
-        ipynb_files = []
-
-        # Walk through the root folder and its subfolders
-        for dirpath, _, filenames in os.walk(self.root_folder):
-            for filename in filenames:
-                # Check if the file is a Jupyter notebook
-                if filename.endswith(".ipynb"):
-                    notebook_path = os.path.join(dirpath, filename)
-                    ipynb_files.append(notebook_path)
-
-        for notebook_path in ipynb_files:
+        # Finish the walk before any work starts: workers copy student notebooks
+        # into the root folder, which a walk still in progress could pick up
+        notebook_paths = []
+        for notebook_path in self._iter_notebooks(self.root_folder):
             # Check if the notebook has the required assignment configuration
             if self.has_assignment(notebook_path):
                 self._print_and_log(f"notebook_path = {notebook_path}")
+                notebook_paths.append(notebook_path)
+
+        # Notebooks with the same name share their solutions folder, their copy in
+        # the root folder and their question module, so each group of them is
+        # processed serially, in walk order
+        groups = {}
+        for notebook_path in notebook_paths:
+            notebook_name = os.path.splitext(os.path.basename(notebook_path))[0]
+            groups.setdefault(sanitize_string(notebook_name), []).append(notebook_path)
+
+        for group in groups.values():
+            if len(group) > 1:
+                logger.warning(
+                    "Notebooks share a name, so their outputs overwrite each other: %s",
+                    ", ".join(group),
+                )
+
+        # The work is dominated by `otter assign` subprocesses, so threads are enough
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._process_notebook_group, group)
+                for group in groups.values()
+            ]
+
+            # Wait for the results so that worker exceptions are raised here
+            try:
+                for future in futures:
+                    future.result()
+            finally:
+                self.log_handler.flush()
+
+    def _process_notebook_group(self, notebook_paths):
+        """
+        Processes notebooks that share a name one after the other.
+
+        Args:
+            notebook_paths (list of str): The paths of the notebooks, in processing order.
+        """
+        for notebook_path in notebook_paths:
+            self._process_single_notebook(notebook_path)
+
+    def _iter_notebooks(self, folder):
+        """
+        Yields the paths of all Jupyter notebooks in a folder and its subfolders.
+
+        The solutions folder is skipped, since it only holds the outputs of this processor,
+        as are Jupyter checkpoints and other folders in `SKIPPED_FOLDERS`.
 
-                # Process the notebook if it meets the criteria
-                self._process_single_notebook(notebook_path)
+        Args:
+            folder (str): The directory to search.
+
+        Yields:
+            str: The path of each `.ipynb` file found.
+        """
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if (
+                        entry.name not in SKIPPED_FOLDERS
+                        and entry.path != self.solutions_folder
+                    ):
+                        yield from self._iter_notebooks(entry.path)
+                elif entry.name.endswith(".ipynb") and entry.is_file():
+                    yield entry.path
 
     def _print_and_log(self, message):
         """
@@ -167,70 +277,88 @@ class NotebookProcessor:
             None
         """
 
-        logging.info(f"Processing notebook: {notebook_path}")
-        notebook_name = os.path.splitext(os.path.basename(notebook_path))[0]
+        logger.info("Processing notebook: %s", notebook_path)
+        notebook_file_name = os.path.basename(notebook_path)
+        notebook_name = os.path.splitext(notebook_file_name)[0]
         notebook_subfolder = os.path.join(self.solutions_folder, notebook_name)
-        os.makedirs(notebook_subfolder, exist_ok=True)
 
-        new_notebook_path = os.path.join(
-            notebook_subfolder, os.path.basename(notebook_path)
-        )
+        # Determine the paths to the autograder and student folders; creating
+        # them creates the notebook's subfolder too
+        dist_folder = os.path.join(notebook_subfolder, "dist")
+        autograder_path = os.path.join(dist_folder, "autograder/")
+        student_path = os.path.join(dist_folder, "student/")
+        os.makedirs(autograder_path, exist_ok=True)
+        os.makedirs(student_path, exist_ok=True)
+
+        new_notebook_path = os.path.join(notebook_subfolder, notebook_file_name)
+
+        # Where the student notebook ends up
+        root_notebook_path = os.path.join(self.root_folder, notebook_file_name)
 
-        # makes a temp copy of the notebook
+        # Base path for the generated solution and question files
+        new_notebook_stem = os.path.join(notebook_subfolder, notebook_name)
+
+        # Path of the temp copy that has the question cells replaced
         temp_notebook_path = os.path.join(
             notebook_subfolder, f"{notebook_name}_temp.ipynb"
         )
-        shutil.copy(notebook_path, temp_notebook_path)
-
-        # Determine the path to the autograder folder
-        autograder_path = os.path.join(notebook_subfolder, "dist/autograder/")
-        os.makedirs(autograder_path, exist_ok=True)
 
-        # Determine the path to the student folder
-        student_path = os.path.join(notebook_subfolder, "dist/student/")
-        os.makedirs(student_path, exist_ok=True)
-
-        if os.path.abspath(notebook_path) != os.path.abspath(new_notebook_path):
-            shutil.move(notebook_path, new_notebook_path)
+        # The solutions folder, and so new_notebook_path, is already absolute
+        if os.path.abspath(notebook_path) != new_notebook_path:
+            try:
+                # Same filesystem in the usual case, so a plain rename will do
+                os.replace(notebook_path, new_notebook_path)
+            except OSError:
+                shutil.move(notebook_path, new_notebook_path)
             self._print_and_log(f"Moved: {notebook_path} -> {new_notebook_path}")
         else:
             self._print_and_log(f"Notebook already in destination: {new_notebook_path}")
 
+        # Parse the notebook once; every step below reads this copy, and the
+        # cell replacements update it in place
+        notebook_data = load_notebook(new_notebook_path)
+
+        # Find every question and configuration tag in a single pass
+        question_tags = ("# BEGIN MULTIPLE CHOICE", "# BEGIN TF", "# BEGIN SELECT MANY")
+        found_tags = self.scan_tags(
+            new_notebook_path,
+            *question_tags,
+            "# ASSIGNMENT CONFIG",
+            notebook_data=notebook_data,
+        )
+
         ### Parse the notebook for multiple choice questions
-        if self.has_assignment(temp_notebook_path, "# BEGIN MULTIPLE CHOICE"):
+        if "# BEGIN MULTIPLE CHOICE" in found_tags:
             self._print_and_log(
                 f"Notebook {temp_notebook_path} has multiple choice questions"
             )
 
             # Extract all the multiple choice questions
-            data = extract_MCQ(temp_notebook_path)
+            data = extract_MCQ(temp_notebook_path, notebook_data)
 
             # determine the output file path
-            solution_path = f"{os.path.splitext(new_notebook_path)[0]}_solutions.py"
+            solution_path = f"{new_notebook_stem}_solutions.py"
 
             # Extract the first value cells
-            value = extract_raw_cells(temp_notebook_path)
+            value = extract_raw_cells(temp_notebook_path, notebook_data=notebook_data)
 
             data = NotebookProcessor.merge_metadata(value, data)
 
-            for data_ in data:
-                # Generate the solution file
-                self.generate_solution_MCQ(data, output_file=solution_path)
+            # Generate the solution file
+            self.generate_solution_MCQ(data, output_file=solution_path)
 
-                question_path = (
-                    f"{new_notebook_path.replace(".ipynb", "")}_questions.py"
-                )
+            question_path = f"{new_notebook_stem}_questions.py"
 
             generate_mcq_file(data, output_file=question_path)
 
             markers = ("# BEGIN MULTIPLE CHOICE", "# END MULTIPLE CHOICE")
 
             replace_cells_between_markers(
-                data, markers, temp_notebook_path, temp_notebook_path
+                data, markers, temp_notebook_path, None, notebook_data
             )
 
         ### Parse the notebook for TF questions
-        if self.has_assignment(temp_notebook_path, "# BEGIN TF"):
+        if "# BEGIN TF" in found_tags:
             markers = ("# BEGIN TF", "# END TF")
 
             self._print_and_log(
@@ -238,13 +366,13 @@ class NotebookProcessor:
             )
 
             # Extract all the multiple choice questions
-            data = extract_TF(temp_notebook_path)
+            data = extract_TF(temp_notebook_path, notebook_data)
 
             # determine the output file path
-            solution_path = f"{os.path.splitext(new_notebook_path)[0]}_solutions.py"
+            solution_path = f"{new_notebook_stem}_solutions.py"
 
             # Extract the first value cells
-            value = extract_raw_cells(temp_notebook_path, markers[0])
+            value = extract_raw_cells(temp_notebook_path, markers[0], notebook_data)
 
             data = NotebookProcessor.merge_metadata(value, data)
 
@@ -252,16 +380,16 @@ class NotebookProcessor:
             # Generate the solution file
             self.generate_solution_MCQ(data, output_file=solution_path)
 
-            question_path = f"{new_notebook_path.replace(".ipynb", "")}_questions.py"
+            question_path = f"{new_notebook_stem}_questions.py"
 
             generate_tf_file(data, output_file=question_path)
 
             replace_cells_between_markers(
-                data, markers, temp_notebook_path, temp_notebook_path
+                data, markers, temp_notebook_path, None, notebook_data
             )
 
         ### Parse the notebook for select_many questions
-        if self.has_assignment(temp_notebook_path, "# BEGIN SELECT MANY"):
+        if "# BEGIN SELECT MANY" in found_tags:
             markers = ("# BEGIN SELECT MANY", "# END SELECT MANY")
 
             self._print_and_log(
@@ -269,13 +397,13 @@ class NotebookProcessor:
             )
 
             # Extract all the multiple choice questions
-            data = extract_SELECT_MANY(temp_notebook_path)
+            data = extract_SELECT_MANY(temp_notebook_path, notebook_data)
 
             # determine the output file path
-            solution_path = f"{os.path.splitext(new_notebook_path)[0]}_solutions.py"
+            solution_path = f"{new_notebook_stem}_solutions.py"
 
             # Extract the first value cells
-            value = extract_raw_cells(temp_notebook_path, markers[0])
+            value = extract_raw_cells(temp_notebook_path, markers[0], notebook_data)
 
             data = NotebookProcessor.merge_metadata(value, data)
 
@@ -283,39 +411,48 @@ class NotebookProcessor:
             # Generate the solution file
             self.generate_solution_MCQ(data, output_file=solution_path)
 
-            question_path = f"{new_notebook_path.replace(".ipynb", "")}_questions.py"
+            question_path = f"{new_notebook_stem}_questions.py"
 
             generate_select_many_file(data, output_file=question_path)
 
             replace_cells_between_markers(
-                data, markers, temp_notebook_path, temp_notebook_path
+                data, markers, temp_notebook_path, None, notebook_data
             )
 
-        if self.has_assignment(temp_notebook_path, "# ASSIGNMENT CONFIG"):
+        # Only notebooks with questions need a temp copy, written once with all
+        # of their replacements; the others are used as they are
+        if found_tags.isdisjoint(question_tags):
+            source_notebook_path = new_notebook_path
+        else:
+            source_notebook_path = temp_notebook_path
+            save_notebook(notebook_data, temp_notebook_path)
+
+        if "# ASSIGNMENT CONFIG" in found_tags:
+            # In-process runs are serialised, so let concurrent workers each
+            # start their own `otter` instead
             self.run_otter_assign(
-                temp_notebook_path, os.path.join(notebook_subfolder, "dist")
-            )
-            student_notebook = os.path.join(
-                notebook_subfolder, "dist", "student", f"{notebook_name}.ipynb"
+                source_notebook_path,
+                dist_folder,
+                in_process=self.max_workers == 1,
             )
+            student_notebook = os.path.join(student_path, notebook_file_name)
             self.clean_notebook(student_notebook)
             NotebookProcessor.replace_temp_in_notebook(
                 student_notebook, student_notebook
             )
-            autograder_notebook = os.path.join(
-                notebook_subfolder, "dist", "autograder", f"{notebook_name}.ipynb"
-            )
+            autograder_notebook = os.path.join(autograder_path, notebook_file_name)
             NotebookProcessor.replace_temp_in_notebook(
                 autograder_notebook, autograder_notebook
             )
-            shutil.copy(student_notebook, self.root_folder)
+            shutil.copyfile(student_notebook, root_notebook_path)
             self._print_and_log(
                 f"Copied and cleaned student notebook: {student_notebook} -> {self.root_folder}"
             )
 
-        # If Otter does not run, move the student file to the main directory
+        # If Otter does not run, move the student file to the main directory,
+        # without the temp postfix
         if "student_notebook" not in locals():
-            path_ = shutil.copy(temp_notebook_path, self.root_folder)
+            path_ = shutil.copyfile(source_notebook_path, root_notebook_path)
             self._print_and_log(
                 f"Copied and cleaned student notebook: {path_} -> {self.root_folder}"
             )
@@ -334,15 +471,19 @@ class NotebookProcessor:
             )
 
         if "question_path" in locals():
-            shutil.move(question_path, student_path)
+            # Same filesystem, so this is a plain rename
+            os.replace(
+                question_path,
+                os.path.join(student_path, os.path.basename(question_path)),
+            )
 
         # Remove the temp copy of the notebook
-        os.remove(temp_notebook_path)
+        if source_notebook_path == temp_notebook_path:
+            os.remove(temp_notebook_path)
 
         # Remove all postfix from filenames in dist
         NotebookProcessor.remove_postfix(autograder_path, "_solutions")
         NotebookProcessor.remove_postfix(student_path, "_questions")
-        NotebookProcessor.remove_postfix(self.root_folder, "_temp")
 
         ### CODE TO ENSURE THAT STUDENT NOTEBOOK IS IMPORTABLE
         if "question_path" in locals():
@@ -354,12 +495,16 @@ class NotebookProcessor:
             if question_file_name_sanitized.endswith("_py"):
                 question_file_name_sanitized = question_file_name_sanitized[:-3] + ".py"
 
+            sanitized_question_path = os.path.join(
+                student_path, question_file_name_sanitized
+            )
+
             # Rename the file
             os.rename(
                 os.path.join(
                     student_path, question_file_name.replace("_questions", "")
                 ),
-                os.path.join(student_path, question_file_name_sanitized),
+                sanitized_question_path,
             )
 
             # Ensure the "questions" folder exists
@@ -367,8 +512,8 @@ class NotebookProcessor:
             os.makedirs(questions_folder_jbook, exist_ok=True)
 
             # Copy the renamed file to the "questions" folder
-            shutil.copy(
-                os.path.join(student_path, question_file_name_sanitized),
+            shutil.copyfile(
+                sanitized_question_path,
                 os.path.join(questions_folder_jbook, question_file_name_sanitized),
             )
 
@@ -385,20 +530,20 @@ class NotebookProcessor:
         None: Writes the modified notebook to the output file.
         """
         # Load the notebook data
-        with open(input_file, "r", encoding="utf-8") as f:
-            notebook_data = json.load(f)
+        notebook_data = load_notebook(input_file)
 
         # Iterate through each cell and update its content
         for cell in notebook_data.get("cells", []):
-            if "source" in cell:
-                # Replace occurrences of '_temp.ipynb' in the cell source
+            source = cell.get("source")
+
+            # Only rebuild sources that actually reference '_temp.ipynb'
+            if source and any("_temp.ipynb" in line for line in source):
                 cell["source"] = [
-                    line.replace("_temp.ipynb", ".ipynb") for line in cell["source"]
+                    line.replace("_temp.ipynb", ".ipynb") for line in source
                 ]
 
         # Write the updated notebook to the output file
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(notebook_data, f, indent=2)
+        save_notebook(notebook_data, output_file)
 
     @staticmethod
     def merge_metadata(raw, data):
@@ -445,35 +590,33 @@ class NotebookProcessor:
 
         # Loop through each question set in the data
         for i, _data in enumerate(data):
-            # Handle 'points' from raw metadata: convert single string value to a list if necessary
-            if isinstance(raw[i]["points"], str):
-                points_ = [float(raw[i]["points"])] * len(
-                    _data
-                )  # Distribute the same point value
-            else:
-                points_ = raw[i]["points"]  # Use provided list of points
+            raw_ = raw[i]
 
             # Remove 'points' from raw metadata to avoid overwriting
-            raw[i].pop("points", None)
+            points_ = raw_.pop("points")
+
+            # Handle 'points' from raw metadata: convert single string value to a list if necessary
+            if isinstance(points_, str):
+                # Distribute the same point value
+                points_ = [float(points_)] * len(_data)
 
             # Handle 'grade' from raw metadata
-            if "grade" in raw[i]:
-                grade_ = [raw[i]["grade"]]
+            grade_ = [raw_["grade"]] if "grade" in raw_ else None
 
             # Merge each question's metadata with corresponding raw metadata
-            for j, (key, _) in enumerate(_data.items()):
-                # Combine raw metadata with question data
-                data[i][key] = data[i][key] | raw[i]
+            for j, question in enumerate(_data.values()):
+                # Combine raw metadata with question data in place
+                question.update(raw_)
                 # Assign the correct point value to the question
-                data[i][key]["points"] = points_[j]
+                question["points"] = points_[j]
 
-                if "grade" in raw[i]:
-                    data[i][key]["grade"] = grade_
+                if grade_ is not None:
+                    question["grade"] = grade_
 
         return data
 
     @staticmethod
-    def has_assignment(notebook_path, *tags):
+    def has_assignment(notebook_path, *tags, notebook_data=None):
         """
         Determines if a Jupyter notebook contains any of the specified configuration tags.
 
@@ -484,6 +627,7 @@ class NotebookProcessor:
             notebook_path (str): The file path to the Jupyter notebook to be checked.
             *tags (str): Variable-length argument list of tags to search for.
                         Defaults to ("# ASSIGNMENT CONFIG",).
+            notebook_data (dict, optional): The already-loaded notebook, to avoid reading it again.
 
         Returns:
             bool: True if the notebook contains any of the specified tags, False otherwise.
@@ -514,27 +658,64 @@ class NotebookProcessor:
             tags = ["# ASSIGNMENT CONFIG", "# BEGIN MULTIPLE CHOICE"]
 
         # Use the helper function to check for the presence of any specified tag
-        return check_for_heading(notebook_path, tags)
+        return check_for_heading(notebook_path, tags, notebook_data)
+
+    @staticmethod
+    def scan_tags(notebook_path, *tags, notebook_data=None):
+        """
+        Finds which of the given tags a Jupyter notebook contains, reading its cells once.
+
+        Args:
+            notebook_path (str): The file path to the Jupyter notebook to be checked.
+            *tags (str): The tags to search for.
+            notebook_data (dict, optional): The already-loaded notebook, to avoid reading it again.
+
+        Returns:
+            set: The tags found in the notebook's heading cells.
+        """
+        if notebook_data is None:
+            notebook_data = _read_notebook_with_tags(notebook_path, tags)
+            if notebook_data is None:
+                return set()
+
+        return find_headings(notebook_data, tags)
 
     @staticmethod
-    def run_otter_assign(notebook_path, dist_folder):
+    def run_otter_assign(notebook_path, dist_folder, in_process=True):
         """
         Runs `otter assign` on the given notebook and outputs to the specified distribution folder.
+
+        With `in_process`, Otter is called in-process when it can be imported, to avoid
+        starting a new interpreter for every notebook; otherwise the `otter` command is
+        used. In-process runs hold `OTTER_LOCK`, while `otter` commands can run side by
+        side, so `NotebookProcessor` only runs Otter in-process with a single worker.
+
+        Args:
+            notebook_path (str): Path to the notebook to assign.
+            dist_folder (str): Folder to write the assignment to.
+            in_process (bool): Whether to call Otter in-process when it can be imported.
         """
         try:
             os.makedirs(dist_folder, exist_ok=True)
-            command = ["otter", "assign", notebook_path, dist_folder]
-            subprocess.run(command, check=True)
-            logger.info(f"Otter assign completed: {notebook_path} -> {dist_folder}")
+            otter_assign = load_otter_assign() if in_process else None
+            if otter_assign is not None:
+                with OTTER_LOCK:
+                    otter_assign(
+                        os.path.abspath(notebook_path), os.path.abspath(dist_folder)
+                    )
+            else:
+                command = ["otter", "assign", notebook_path, dist_folder]
+                subprocess.run(command, check=True)
+            logger.info("Otter assign completed: %s -> %s", notebook_path, dist_folder)
 
             # Remove all postfix _test from filenames in dist_folder
-            NotebookProcessor.remove_postfix(dist_folder)
+            NotebookProcessor.remove_postfix(dist_folder, recursive=True)
 
         except subprocess.CalledProcessError as e:
-            logger.info(f"Error running `otter assign` for {notebook_path}: {e}")
-        except Exception as e:
-            logger.info(
-                f"Unexpected error during `otter assign` for {notebook_path}: {e}"
+            logger.error("Error running `otter assign` for %s: %s", notebook_path, e)
+        except Exception:
+            logger.exception(
+                "Unexpected error during `otter assign` for %s", notebook_path
             )
 
     @staticmethod
@@ -572,131 +753,48 @@ class NotebookProcessor:
                 solutions[solution_key] = question_data["solution"]
                 total_points += question_data["points"]
 
-        # Write updated total_points and solutions back to the file
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write("from typing import Any\n\n")
-            f.write(f"total_points: float = {total_points}\n\n")
+        # Build the whole file in memory, then write updated total_points and
+        # solutions back in a single call
+        parts = [
+            "from typing import Any\n\n",
+            f"total_points: float = {total_points}\n\n",
+            "solutions: dict[str, Any] = {\n",
+        ]
+        # For safety, we assume solutions are strings, but if not, repr would be safer
+        parts.extend(
+            f'    "{key}": {repr(solution)},\n' for key, solution in solutions.items()
+        )
+        parts.append("}\n")
 
-            f.write("solutions: dict[str, Any] = {\n")
-            for key, solution in solutions.items():
-                # For safety, we assume solutions are strings, but if not, repr would be safer
-                f.write(f'    "{key}": {repr(solution)},\n')
-            f.write("}\n")
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write("".join(parts))
 
-    def extract_MCQ(ipynb_file):
+    @staticmethod
+    def remove_postfix(dist_folder, suffix="_temp", recursive=False):
         """
-        Extracts questions from markdown cells and organizes them as a nested dictionary,
-        including subquestion numbers.
+        Removes a postfix from the names of the files in a folder.
 
         Args:
-            ipynb_file (str): Path to the .ipynb file.
-
-        Returns:
-            dict: A nested dictionary where the first-level key is the question name (text after ##),
-                and the value is a dictionary with keys: 'name', 'subquestion_number',
-                'question_text', 'OPTIONS', and 'solution'.
+            dist_folder (str): The folder whose files are renamed.
+            suffix (str): The postfix to remove.
+            recursive (bool): Whether to rename files in subfolders as well.
         """
-        try:
-            # Load the notebook file
-            with open(ipynb_file, "r", encoding="utf-8") as f:
-                notebook_data = json.load(f)
-
-            cells = notebook_data.get("cells", [])
-            results = {}
-            within_section = False
-            subquestion_number = 0  # Counter for subquestions
-
-            for cell in cells:
-                if cell.get("cell_type") == "raw":
-                    # Check for the start and end labels in raw cells
-                    raw_content = "".join(cell.get("source", []))
-                    if "# BEGIN MULTIPLE CHOICE" in raw_content:
-                        within_section = True
-                        subquestion_number = (
-                            0  # Reset counter at the start of a new section
-                        )
-                        continue
-                    elif "# END MULTIPLE CHOICE" in raw_content:
-                        within_section = False
-                        continue
-
-                if within_section and cell.get("cell_type") == "markdown":
-                    # Parse markdown cell content
-                    markdown_content = "".join(cell.get("source", []))
-
-                    # Extract title (## heading)
-                    title_match = re.search(
-                        r"^##\s*(.+)", markdown_content, re.MULTILINE
-                    )
-                    title = title_match.group(1).strip() if title_match else None
-
-                    if title:
-                        subquestion_number += (
-                            1  # Increment the subquestion number for each question
-                        )
-
-                        # Extract question text (### heading)
-                        question_text_match = re.search(
-                            r"^###\s*\*\*(.+)\*\*", markdown_content, re.MULTILINE
-                        )
-                        question_text = (
-                            question_text_match.group(1).strip()
-                            if question_text_match
-                            else None
-                        )
-
-                        # Extract OPTIONS (lines after #### options)
-                        options_match = re.search(
-                            r"####\s*options\s*(.+?)(?=####|$)",
-                            markdown_content,
-                            re.DOTALL | re.IGNORECASE,
-                        )
-                        options = (
-                            [
-                                line.strip()
-                                for line in options_match.group(1).strip().splitlines()
-                                if line.strip()
-                            ]
-                            if options_match
-                            else []
-                        )
-
-                        # Extract solution (line after #### SOLUTION)
-                        solution_match = re.search(
-                            r"####\s*SOLUTION\s*(.+)", markdown_content, re.IGNORECASE
-                        )
-                        solution = (
-                            solution_match.group(1).strip() if solution_match else None
-                        )
-
-                        # Create nested dictionary for the question
-                        results[title] = {
-                            "name": title,
-                            "subquestion_number": subquestion_number,
-                            "question_text": question_text,
-                            "OPTIONS": options,
-                            "solution": solution,
-                        }
-
-            return results
-
-        except FileNotFoundError:
-            print(f"File {ipynb_file} not found.")
-            return {}
-        except json.JSONDecodeError:
-            print("Invalid JSON in notebook file.")
-            return {}
+        logger.info("Removing postfix '%s' from filenames in %s", suffix, dist_folder)
+        if recursive:
+            folders = ((root, files) for root, _, files in os.walk(dist_folder))
+        else:
+            # A single listing of the folder, without walking into subfolders
+            with os.scandir(dist_folder) as entries:
+                files = [entry.name for entry in entries if entry.is_file()]
+            folders = ((dist_folder, files),)
 
-    @staticmethod
-    def remove_postfix(dist_folder, suffix="_temp"):
-        logging.info(f"Removing postfix '{suffix}' from filenames in {dist_folder}")
-        for root, _, files in os.walk(dist_folder):
+        for root, files in folders:
             for file in files:
                 if suffix in file:
                     old_file_path = os.path.join(root, file)
                     new_file_path = os.path.join(root, file.replace(suffix, ""))
                     os.rename(old_file_path, new_file_path)
-                    logging.info(f"Renamed: {old_file_path} -> {new_file_path}")
+                    logger.info("Renamed: %s -> %s", old_file_path, new_file_path)
 
     @staticmethod
     def clean_notebook(notebook_path):
@@ -706,26 +804,42 @@ class NotebookProcessor:
         clean_notebook(notebook_path)
 
 
-def extract_raw_cells(ipynb_file, heading="# BEGIN MULTIPLE CHOICE"):
+@lru_cache(maxsize=1)
+def load_otter_assign():
+    """
+    Imports Otter's programmatic `assign` entry point, once.
+
+    Returns:
+        callable or None: `otter.assign.main`, or None if Otter is not importable.
+    """
+    try:
+        from otter.assign import main
+    except ImportError:
+        return None
+    return main
+
+
+def extract_raw_cells(
+    ipynb_file, heading="# BEGIN MULTIPLE CHOICE", notebook_data=None
+):
     """
     Extracts all metadata from value cells in a Jupyter Notebook file for a specified heading.
 
     Args:
         ipynb_file (str): Path to the .ipynb file.
         heading (str): The heading to search for in value cells.
+        notebook_data (dict, optional): The already-loaded notebook, to avoid reading it again.
 
     Returns:
         list of dict: A list of dictionaries containing extracted metadata for each heading occurrence.
     """
     try:
-        with open(ipynb_file, "r", encoding="utf-8") as f:
-            notebook_data = json.load(f)
+        if notebook_data is None:
+            notebook_data = load_notebook(ipynb_file)
 
         # Extract value cell content
         raw_cells = [
-            "".join(
-                cell.get("source", [])
-            )  # Join multiline sources into a single string
+            _cell_text(cell)  # Join multiline sources into a single string
             for cell in notebook_data.get("cells", [])
             if cell.get("cell_type") == "raw"
         ]
@@ -745,6 +859,59 @@ def extract_raw_cells(ipynb_file, heading="# BEGIN MULTIPLE CHOICE"):
         return []
 
 
+def load_notebook(notebook_path):
+    """
+    Loads a Jupyter notebook as plain JSON.
+
+    Args:
+        notebook_path (str): Path to the .ipynb file.
+
+    Returns:
+        dict: The notebook data.
+    """
+    with open(notebook_path, "rb") as f:
+        return _parse_json(f.read())
+
+
+def save_notebook(notebook_data, notebook_path):
+    """
+    Writes a notebook as JSON indented by two spaces.
+
+    Args:
+        notebook_data (dict): The notebook data.
+        notebook_path (str): Path to the .ipynb file.
+    """
+    if orjson is not None:
+        with open(notebook_path, "wb") as f:
+            f.write(orjson.dumps(notebook_data, option=orjson.OPT_INDENT_2))
+        return
+
+    with open(notebook_path, "w", encoding="utf-8") as f:
+        json.dump(notebook_data, f, indent=2, ensure_ascii=False)
+
+
+def _parse_json(content):
+    # orjson parses notebooks several times faster than json, when installed;
+    # its decode error subclasses json.JSONDecodeError
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _cell_text(cell):
+    """
+    Returns the source of a notebook cell as a single string.
+
+    Args:
+        cell (dict): A cell from a notebook loaded as JSON.
+
+    Returns:
+        str: The cell source, joined only if it is stored as a list of lines.
+    """
+    source = cell.get("source", "")
+    return "".join(source) if isinstance(source, list) else source
+
+
 def _extract_metadata_from_heading(raw_cell, heading="# BEGIN MULTIPLE CHOICE"):
     """
     Extracts metadata for a single value cell string each time the heading is found.
@@ -776,13 +943,14 @@ def _extract_metadata_from_heading(raw_cell, heading="# BEGIN MULTIPLE CHOICE"):
     return metadata_list
 
 
-def extract_SELECT_MANY(ipynb_file):
+def extract_SELECT_MANY(ipynb_file, notebook_data=None):
     """
     Extracts questions marked by `# BEGIN SELECT MANY` and `# END SELECT MANY` in markdown cells,
     including all lines under the SOLUTION header until the first blank line or whitespace-only line.
 
     Args:
         ipynb_file (str): Path to the .ipynb file.
+        notebook_data (dict, optional): The already-loaded notebook, to avoid reading it again.
 
     Returns:
         list: A list of dictionaries, where each dictionary corresponds to questions within
@@ -790,9 +958,9 @@ def extract_SELECT_MANY(ipynb_file):
               'name', 'subquestion_number', 'question_text', and 'solution'.
     """
     try:
-        # Load the notebook file
-        with open(ipynb_file, "r", encoding="utf-8") as f:
-            notebook_data = json.load(f)
+        # Load the notebook file, unless it was passed in
+        if notebook_data is None:
+            notebook_data = load_notebook(ipynb_file)
 
         cells = notebook_data.get("cells", [])
         sections = []  # List to store results for each section
@@ -803,7 +971,7 @@ def extract_SELECT_MANY(ipynb_file):
         for cell in cells:
             if cell.get("cell_type") == "raw":
                 # Check for the start and end labels in raw cells
-                raw_content = "".join(cell.get("source", []))
+                raw_content = _cell_text(cell)
                 if "# BEGIN SELECT MANY" in raw_content:
                     within_section = True
                     subquestion_number = (
@@ -819,10 +987,14 @@ def extract_SELECT_MANY(ipynb_file):
 
             if within_section and cell.get("cell_type") == "markdown":
                 # Parse markdown cell content
-                markdown_content = "".join(cell.get("source", []))
+                markdown_content = _cell_text(cell)
 
-                # Extract title (## heading)
-                title_match = re.search(r"^##\s*(.+)", markdown_content, re.MULTILINE)
+                # Extract title (## heading), skipping the regex if there is none
+                title_match = (
+                    TITLE_PATTERN.search(markdown_content)
+                    if "##" in markdown_content
+                    else None
+                )
                 title = title_match.group(1).strip() if title_match else None
 
                 if title:
@@ -831,9 +1003,7 @@ def extract_SELECT_MANY(ipynb_file):
                     )
 
                     # Extract question text (### heading)
-                    question_text_match = re.search(
-                        r"^###\s*\*\*(.+)\*\*", markdown_content, re.MULTILINE
-                    )
+                    question_text_match = QUESTION_TEXT_PATTERN.search(markdown_content)
                     question_text = (
                         question_text_match.group(1).strip()
                         if question_text_match
@@ -841,11 +1011,7 @@ def extract_SELECT_MANY(ipynb_file):
                     )
 
                     # Extract OPTIONS (lines after #### options)
-                    options_match = re.search(
-                        r"####\s*options\s*(.+?)(?=####|$)",
-                        markdown_content,
-                        re.DOTALL | re.IGNORECASE,
-                    )
+                    options_match = OPTIONS_PATTERN.search(markdown_content)
                     options = (
                         [
                             line.strip()
@@ -886,13 +1052,14 @@ def extract_SELECT_MANY(ipynb_file):
         return []
 
 
-def extract_TF(ipynb_file):
+def extract_TF(ipynb_file, notebook_data=None):
     """
     Extracts True False questions from markdown cells within sections marked by
     `# BEGIN TF` and `# END TF`.
 
     Args:
         ipynb_file (str): Path to the .ipynb file.
+        notebook_data (dict, optional): The already-loaded notebook, to avoid reading it again.
 
     Returns:
         list: A list of dictionaries, where each dictionary corresponds to questions within
@@ -900,9 +1067,9 @@ def extract_TF(ipynb_file):
               'name', 'subquestion_number', 'question_text', and 'solution'.
     """
     try:
-        # Load the notebook file
-        with open(ipynb_file, "r", encoding="utf-8") as f:
-            notebook_data = json.load(f)
+        # Load the notebook file, unless it was passed in
+        if notebook_data is None:
+            notebook_data = load_notebook(ipynb_file)
 
         cells = notebook_data.get("cells", [])
         sections = []  # List to store results for each section
@@ -913,7 +1080,7 @@ def extract_TF(ipynb_file):
         for cell in cells:
             if cell.get("cell_type") == "raw":
                 # Check for the start and end labels in raw cells
-                raw_content = "".join(cell.get("source", []))
+                raw_content = _cell_text(cell)
                 if "# BEGIN TF" in raw_content:
                     within_section = True
                     subquestion_number = (
@@ -929,10 +1096,14 @@ def extract_TF(ipynb_file):
 
             if within_section and cell.get("cell_type") == "markdown":
                 # Parse markdown cell content
-                markdown_content = "".join(cell.get("source", []))
+                markdown_content = _cell_text(cell)
 
-                # Extract title (## heading)
-                title_match = re.search(r"^##\s*(.+)", markdown_content, re.MULTILINE)
+                # Extract title (## heading), skipping the regex if there is none
+                title_match = (
+                    TITLE_PATTERN.search(markdown_content)
+                    if "##" in markdown_content
+                    else None
+                )
                 title = title_match.group(1).strip() if title_match else None
 
                 if title:
@@ -941,9 +1112,7 @@ def extract_TF(ipynb_file):
                     )
 
                     # Extract question text (### heading)
-                    question_text_match = re.search(
-                        r"^###\s*\*\*(.+)\*\*", markdown_content, re.MULTILINE
-                    )
+                    question_text_match = QUESTION_TEXT_PATTERN.search(markdown_content)
                     question_text = (
                         question_text_match.group(1).strip()
                         if question_text_match
@@ -951,9 +1120,7 @@ def extract_TF(ipynb_file):
                     )
 
                     # Extract solution (line after #### SOLUTION)
-                    solution_match = re.search(
-                        r"####\s*SOLUTION\s*(.+)", markdown_content, re.IGNORECASE
-                    )
+                    solution_match = SOLUTION_PATTERN.search(markdown_content)
                     solution = (
                         solution_match.group(1).strip() if solution_match else None
                     )
@@ -976,13 +1143,14 @@ def extract_TF(ipynb_file):
         return []
 
 
-def extract_MCQ(ipynb_file):
+def extract_MCQ(ipynb_file, notebook_data=None):
     """
     Extracts multiple-choice questions from markdown cells within sections marked by
     `# BEGIN MULTIPLE CHOICE` and `# END MULTIPLE CHOICE`.
 
     Args:
         ipynb_file (str): Path to the .ipynb file.
+        notebook_data (dict, optional): The already-loaded notebook, to avoid reading it again.
 
     Returns:
         list: A list of dictionaries, where each dictionary corresponds to questions within
@@ -990,9 +1158,9 @@ def extract_MCQ(ipynb_file):
               'name', 'subquestion_number', 'question_text', 'OPTIONS', and 'solution'.
     """
     try:
-        # Load the notebook file
-        with open(ipynb_file, "r", encoding="utf-8") as f:
-            notebook_data = json.load(f)
+        # Load the notebook file, unless it was passed in
+        if notebook_data is None:
+            notebook_data = load_notebook(ipynb_file)
 
         cells = notebook_data.get("cells", [])
         sections = []  # List to store results for each section
@@ -1003,7 +1171,7 @@ def extract_MCQ(ipynb_file):
         for cell in cells:
             if cell.get("cell_type") == "raw":
                 # Check for the start and end labels in raw cells
-                raw_content = "".join(cell.get("source", []))
+                raw_content = _cell_text(cell)
                 if "# BEGIN MULTIPLE CHOICE" in raw_content:
                     within_section = True
                     subquestion_number = (
@@ -1019,10 +1187,14 @@ def extract_MCQ(ipynb_file):
 
             if within_section and cell.get("cell_type") == "markdown":
                 # Parse markdown cell content
-                markdown_content = "".join(cell.get("source", []))
+                markdown_content = _cell_text(cell)
 
-                # Extract title (## heading)
-                title_match = re.search(r"^##\s*(.+)", markdown_content, re.MULTILINE)
+                # Extract title (## heading), skipping the regex if there is none
+                title_match = (
+                    TITLE_PATTERN.search(markdown_content)
+                    if "##" in markdown_content
+                    else None
+                )
                 title = title_match.group(1).strip() if title_match else None
 
                 if title:
@@ -1031,9 +1203,7 @@ def extract_MCQ(ipynb_file):
                     )
 
                     # Extract question text (### heading)
-                    question_text_match = re.search(
-                        r"^###\s*\*\*(.+)\*\*", markdown_content, re.MULTILINE
-                    )
+                    question_text_match = QUESTION_TEXT_PATTERN.search(markdown_content)
                     question_text = (
                         question_text_match.group(1).strip()
                         if question_text_match
@@ -1041,11 +1211,7 @@ def extract_MCQ(ipynb_file):
                     )
 
                     # Extract OPTIONS (lines after #### options)
-                    options_match = re.search(
-                        r"####\s*options\s*(.+?)(?=####|$)",
-                        markdown_content,
-                        re.DOTALL | re.IGNORECASE,
-                    )
+                    options_match = OPTIONS_PATTERN.search(markdown_content)
                     options = (
                         [
                             line.strip()
@@ -1057,9 +1223,7 @@ def extract_MCQ(ipynb_file):
                     )
 
                     # Extract solution (line after #### SOLUTION)
-                    solution_match = re.search(
-                        r"####\s*SOLUTION\s*(.+)", markdown_content, re.IGNORECASE
-                    )
+                    solution_match = SOLUTION_PATTERN.search(markdown_content)
                     solution = (
                         solution_match.group(1).strip() if solution_match else None
                     )
@@ -1083,70 +1247,165 @@ def extract_MCQ(ipynb_file):
         return []
 
 
-def check_for_heading(notebook_path, search_strings):
+def check_for_heading(notebook_path, search_strings, notebook_data=None):
     """
     Checks if a Jupyter notebook contains a heading cell whose source matches any of the given strings.
+
+    If `notebook_data` is given, it is searched instead of reading the file again.
     """
     try:
-        with open(notebook_path, "r", encoding="utf-8") as f:
-            notebook = nbformat.read(f, as_version=4)
-            for cell in notebook.cells:
-                if cell.cell_type == "raw" and cell.source.startswith("#"):
-                    if any(
-                        search_string in cell.source for search_string in search_strings
-                    ):
-                        return True
-    except Exception as e:
-        logger.info(f"Error reading notebook {notebook_path}: {e}")
+        if notebook_data is None:
+            notebook_data = _read_notebook_with_tags(notebook_path, search_strings)
+            if notebook_data is None:
+                return False
+
+        return bool(find_headings(notebook_data, search_strings))
+    except Exception:
+        logger.exception("Error reading notebook %s", notebook_path)
     return False
 
 
+def find_headings(notebook_data, search_strings):
+    """
+    Finds which of the given strings occur in a notebook's heading cells.
+
+    Args:
+        notebook_data (dict): The notebook as JSON.
+        search_strings (iterable of str): The strings to look for.
+
+    Returns:
+        set: The strings found in raw cells whose source starts with "#".
+    """
+    found = set()
+    for cell in notebook_data.get("cells", []):
+        if cell.get("cell_type") != "raw":
+            continue
+        source = _cell_text(cell)
+        if source.startswith("#"):
+            found.update(
+                search_string
+                for search_string in search_strings
+                if search_string in source
+            )
+    return found
+
+
+def _read_notebook_with_tags(notebook_path, search_strings):
+    """
+    Loads a notebook, unless none of the given strings occur anywhere in its file.
+
+    Args:
+        notebook_path (str): Path to the .ipynb file.
+        search_strings (iterable of str): The strings to look for.
+
+    Returns:
+        dict or None: The notebook as JSON, or None if no string occurs in the file.
+    """
+    # A tag must appear, JSON-escaped, somewhere in the file for any cell to
+    # contain it, so most notebooks can be ruled out without parsing them
+    patterns = [
+        json.dumps(search_string)[1:-1].encode() for search_string in search_strings
+    ]
+
+    with open(notebook_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < mmap.PAGESIZE:
+            content = f.read()
+            found = any(content.find(pattern) != -1 for pattern in patterns)
+        else:
+            # Scan larger notebooks through a memory map instead of a copy;
+            # note that `in` on an mmap only tests single bytes
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                found = any(mapped.find(pattern) != -1 for pattern in patterns)
+            content = f.read() if found else None
+
+    return _parse_json(content) if found else None
+
+
 def clean_notebook(notebook_path):
     """
     Removes specific cells and makes Markdown cells non-editable and non-deletable by updating their metadata.
+    Outputs and execution counts are cleared from code cells.
     """
     try:
-        with open(notebook_path, "r", encoding="utf-8") as f:
-            notebook = nbformat.read(f, as_version=4)
+        # Plain JSON is enough here; nbformat's validation and NotebookNode
+        # conversion are not needed to patch metadata
+        notebook = load_notebook(notebook_path)
+
+        # Cell IDs are required from nbformat 4.5 onwards
+        needs_ids = notebook.get("nbformat_minor", 0) >= 5
+
+        # Set whenever the notebook changes, so a clean notebook is not rewritten
+        dirty = False
 
         cleaned_cells = []
-        for cell in notebook.cells:
-            if not hasattr(cell, "cell_type") or not hasattr(cell, "source"):
+        for cell in notebook.get("cells", []):
+            if "cell_type" not in cell or "source" not in cell:
+                dirty = True
                 continue
 
-            if (
-                "## Submission" not in cell.source
-                and "# Save your notebook first," not in cell.source
-            ):
-                if cell.cell_type == "markdown":
-                    cell.metadata["editable"] = cell.metadata.get("editable", False)
-                    cell.metadata["deletable"] = cell.metadata.get("deletable", False)
-                if cell.cell_type == "code":
-                    cell.metadata["tags"] = cell.metadata.get("tags", [])
-                    if "skip-execution" not in cell.metadata["tags"]:
-                        cell.metadata["tags"].append("skip-execution")
+            source = cell["source"]
+            if isinstance(source, list):
+                source = "".join(source)
+            else:
+                cell["source"] = source.splitlines(keepends=True)
+                dirty = True
+
+            if not any(marker in source for marker in REMOVED_CELL_MARKERS):
+                if "metadata" not in cell:
+                    cell["metadata"] = {}
+                    dirty = True
+                metadata = cell["metadata"]
+                cell_type = cell["cell_type"]
+                if cell_type == "markdown":
+                    for key in ("editable", "deletable"):
+                        if key not in metadata:
+                            metadata[key] = False
+                            dirty = True
+                elif cell_type == "code":
+                    tags = metadata.setdefault("tags", [])
+                    if "skip-execution" not in tags:
+                        tags.append("skip-execution")
+                        dirty = True
+
+                    # Students start from a clean slate, and stale outputs (often
+                    # base64 images) dominate the notebook's size
+                    if cell.get("outputs") or cell.get("execution_count") is not None:
+                        cell["outputs"] = []
+                        cell["execution_count"] = None
+                        dirty = True
+
+                if needs_ids and "id" not in cell:
+                    cell["id"] = uuid.uuid4().hex[:8]
+                    dirty = True
 
                 cleaned_cells.append(cell)
             else:
-                (f"Removed cell: {cell.source.strip()[:50]}...")
+                dirty = True
+
+        if not dirty:
+            logger.info("Notebook already clean: %s", notebook_path)
+            return
 
-        notebook.cells = cleaned_cells
+        notebook["cells"] = cleaned_cells
 
+        # Match nbformat's on-disk layout
         with open(notebook_path, "w", encoding="utf-8") as f:
-            nbformat.write(notebook, f)
-        logger.info(f"Cleaned notebook: {notebook_path}")
+            json.dump(notebook, f, indent=1, sort_keys=True, ensure_ascii=False)
+            f.write("\n")
+        logger.info("Cleaned notebook: %s", notebook_path)
 
-    except Exception as e:
-        logger.info(f"Error cleaning notebook {notebook_path}: {e}")
+    except Exception:
+        logger.exception("Error cleaning notebook %s", notebook_path)
 
 
-def ensure_imports(output_file, header_lines):
+def ensure_imports(output_file, header_lines, new_content=""):
     """
     Ensures specified header lines are present at the top of the file.
 
     Args:
         output_file (str): The path of the file to check and modify.
         header_lines (list of str): Lines to ensure are present at the top.
+        new_content (str): Content to append to the file in the same write.
 
     Returns:
         str: The existing content of the file (without the header).
@@ -1165,11 +1424,14 @@ def ensure_imports(output_file, header_lines):
         f.writelines(missing_lines)
         # Retain the existing content
         f.write(existing_content)
+        f.write(new_content)
 
     return existing_content
 
 
-def replace_cells_between_markers(data, markers, ipynb_file, output_file):
+def replace_cells_between_markers(
+    data, markers, ipynb_file, output_file, notebook_data=None
+):
     """
     Replaces the cells between specified markers in a Jupyter Notebook (.ipynb file)
     with provided replacement cells and writes the result to the output file.
@@ -1178,16 +1440,28 @@ def replace_cells_between_markers(data, markers, ipynb_file, output_file):
     data (list): A list of dictionaries with data for creating replacement cells.
     markers (tuple): A tuple containing two strings: the BEGIN and END markers.
     ipynb_file (str): Path to the input Jupyter Notebook file.
-    output_file (str): Path to the output Jupyter Notebook file.
+    output_file (str or None): Path to the output Jupyter Notebook file, or None to
+        only update `notebook_data`.
+    notebook_data (dict, optional): The already-loaded notebook, which is updated in place.
 
     Returns:
     None: Writes the modified notebook to the output file.
     """
     begin_marker, end_marker = markers
-    file_name_ipynb = ipynb_file.split("/")[-1].replace("_temp.ipynb", "")
+    file_name_ipynb = os.path.splitext(os.path.basename(ipynb_file))[0].removesuffix(
+        "_temp"
+    )
 
     file_name_ipynb = sanitize_string(file_name_ipynb)
 
+    if not data:
+        return
+
+    # Load the notebook data once, unless it was passed in; each replacement is
+    # applied in memory
+    if notebook_data is None:
+        notebook_data = load_notebook(ipynb_file)
+
     # Iterate over each set of replacement data
     for data_ in data:
         dict_ = data_[next(iter(data_.keys()))]
@@ -1205,53 +1479,35 @@ def replace_cells_between_markers(data, markers, ipynb_file, output_file):
             "execution_count": None,
         }
 
-        # Process the notebook cells
-        new_cells = []
-        inside_markers = False
-        done = False
-
-        # Load the notebook data
-        with open(ipynb_file, "r", encoding="utf-8") as f:
-            notebook_data = json.load(f)
-
-        for cell in notebook_data["cells"]:
-            if cell.get("cell_type") == "raw" and not done:
-                if any(begin_marker in line for line in cell.get("source", [])):
-                    # Enter the marked block
-                    inside_markers = True
-                    new_cells.append(replacement_cells)
-                    continue
-                elif inside_markers:
-                    if any(end_marker in line for line in cell.get("source", [])):
-                        # Exit the marked block
-                        inside_markers = False
-                        done = True
-                        continue
-                    else:
-                        continue
-                else:
-                    new_cells.append(cell)
-            elif inside_markers:
-                # Skip cells inside the marked block
-                continue
-            else:
-                new_cells.append(cell)
-                continue
+        # Find the first marked block, and replace it in place rather than
+        # rebuilding the cell list
+        cells = notebook_data["cells"]
+        block_start = None
+        block_stop = len(cells)
+        replacements = 0
 
-            if done:
-                # Add cells outside the marked block
-                new_cells.append(cell)
+        for i, cell in enumerate(cells):
+            if cell.get("cell_type") != "raw":
                 continue
+            if any(begin_marker in line for line in cell.get("source", [])):
+                # Enter the marked block; every BEGIN marker gets a replacement
+                if block_start is None:
+                    block_start = i
+                replacements += 1
+            elif block_start is not None and any(
+                end_marker in line for line in cell.get("source", [])
+            ):
+                # Exit the marked block
+                block_stop = i + 1
+                break
 
-        # Update the notebook with modified cells, preserving metadata
-        notebook_data["cells"] = new_cells
-
-        # Write the modified notebook to the output file
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(notebook_data, f, indent=2)
+        # Cells inside the marked block are dropped, preserving the rest
+        if block_start is not None:
+            cells[block_start:block_stop] = [replacement_cells] * replacements
 
-        # Update ipynb_file to the output file for subsequent iterations
-        ipynb_file = output_file
+    # Write the modified notebook to the output file
+    if output_file is not None:
+        save_notebook(notebook_data, output_file)
 
 
 def generate_mcq_file(data_dict, output_file="mc_questions.py"):
@@ -1274,53 +1530,39 @@ def generate_mcq_file(data_dict, output_file="mc_questions.py"):
         "pn.extension()\n\n",
     ]
 
-    # Ensure header lines are present
-    _existing_content = ensure_imports(output_file, header_lines)
-
+    # Collect the classes for all questions
+    parts = []
     for question_dict in data_dict:
-        with open(output_file, "a", encoding="utf-8") as f:
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                if i == 0:
-                    # Write the MCQuestion class
-                    f.write(
-                        f"class Question{q_value['question number']}(MCQuestion):\n"
-                    )
-                    f.write("    def __init__(self):\n")
-                    f.write("        super().__init__(\n")
-                    f.write(f"            title=f'{q_value['question_text']}',\n")
-                    f.write("            style=MCQ,\n")
-                    f.write(
-                        f"            question_number={q_value['question number']},\n"
-                    )
-                break
-
-            keys = []
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                # Write keys
-                keys.append(f"q{q_value['subquestion_number']}-{q_value['name']}")
-
-            f.write(f"            keys={keys},\n")
-
-            options = []
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                # Write options
-                options.append(q_value["OPTIONS"])
-
-            f.write(f"            options={options},\n")
+        # The class header comes from the first question of the set
+        first_question = next(iter(question_dict.values()))
+        question_number = first_question["question number"]
+
+        # Write the MCQuestion class
+        parts.append(
+            f"class Question{question_number}(MCQuestion):\n"
+            "    def __init__(self):\n"
+            "        super().__init__(\n"
+            f"            title=f'{first_question['question_text']}',\n"
+            "            style=MCQ,\n"
+            f"            question_number={question_number},\n"
+        )
 
-            descriptions = []
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                # Write descriptions
-                descriptions.append(q_value["question_text"])
-            f.write(f"            descriptions={descriptions},\n")
+        # Gather the fields of every question in a single pass
+        keys, options, descriptions, points = [], [], [], []
+        for q_value in question_dict.values():
+            keys.append(f"q{q_value['subquestion_number']}-{q_value['name']}")
+            options.append(q_value["OPTIONS"])
+            descriptions.append(q_value["question_text"])
+            points.append(q_value["points"])
 
-            points = []
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                # Write points
-                points.append(q_value["points"])
+        parts.append(f"            keys={keys},\n")
+        parts.append(f"            options={options},\n")
+        parts.append(f"            descriptions={descriptions},\n")
+        parts.append(f"            points={points},\n")
+        parts.append("        )\n")
 
-            f.write(f"            points={points},\n")
-            f.write("        )\n")
+    # Ensure header lines are present, and append the classes in the same write
+    ensure_imports(output_file, header_lines, "".join(parts))
 
 
 def generate_select_many_file(data_dict, output_file="select_many_questions.py"):
@@ -1343,59 +1585,44 @@ def generate_select_many_file(data_dict, output_file="select_many_questions.py")
         "pn.extension()\n\n",
     ]
 
-    # Ensure header lines are present
-    _existing_content = ensure_imports(output_file, header_lines)
-
+    # Collect the classes for all questions
+    parts = []
     for question_dict in data_dict:
-        with open(output_file, "a", encoding="utf-8") as f:
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                if i == 0:
-                    # Write the MCQuestion class
-                    f.write(
-                        f"class Question{q_value['question number']}(SelectMany):\n"
-                    )
-                    f.write("    def __init__(self):\n")
-                    f.write("        super().__init__(\n")
-                    f.write(f"            title=f'{q_value['question_text']}',\n")
-                    f.write("            style=MultiSelect,\n")
-                    f.write(
-                        f"            question_number={q_value['question number']},\n"
-                    )
-                break
-
-            keys = []
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                # Write keys
-                keys.append(f"q{q_value['subquestion_number']}-{q_value['name']}")
-
-            f.write(f"            keys={keys},\n")
-
-            descriptions = []
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                # Write descriptions
-                descriptions.append(q_value["question_text"])
-            f.write(f"            descriptions={descriptions},\n")
-
-            options = []
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                # Write options
-                options.append(q_value["OPTIONS"])
+        # The class header comes from the first question of the set
+        first_question = next(iter(question_dict.values()))
+        question_number = first_question["question number"]
+
+        # Write the MCQuestion class
+        parts.append(
+            f"class Question{question_number}(SelectMany):\n"
+            "    def __init__(self):\n"
+            "        super().__init__(\n"
+            f"            title=f'{first_question['question_text']}',\n"
+            "            style=MultiSelect,\n"
+            f"            question_number={question_number},\n"
+        )
 
-            f.write(f"            options={options},\n")
+        # Gather the fields of every question in a single pass
+        keys, descriptions, options, points = [], [], [], []
+        for q_value in question_dict.values():
+            keys.append(f"q{q_value['subquestion_number']}-{q_value['name']}")
+            descriptions.append(q_value["question_text"])
+            options.append(q_value["OPTIONS"])
+            points.append(q_value["points"])
 
-            points = []
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                # Write points
-                points.append(q_value["points"])
+        parts.append(f"            keys={keys},\n")
+        parts.append(f"            descriptions={descriptions},\n")
+        parts.append(f"            options={options},\n")
+        parts.append(f"            points={points},\n")
 
-            f.write(f"            points={points},\n")
+        if "grade" in first_question:
+            grade = first_question["grade"]
+            parts.append(f"            grade={grade},\n")
 
-            first_key = next(iter(question_dict))
-            if "grade" in question_dict[first_key]:
-                grade = question_dict[first_key]["grade"]
-                f.write(f"            grade={grade},\n")
+        parts.append("        )\n")
 
-            f.write("        )\n")
+    # Ensure header lines are present, and append the classes in the same write
+    ensure_imports(output_file, header_lines, "".join(parts))
 
 
 def generate_tf_file(data_dict, output_file="tf_questions.py"):
@@ -1418,46 +1645,37 @@ def generate_tf_file(data_dict, output_file="tf_questions.py"):
         "pn.extension()\n\n",
     ]
 
-    # Ensure header lines are present
-    _existing_content = ensure_imports(output_file, header_lines)
-
+    # Collect the classes for all questions
+    parts = []
     for question_dict in data_dict:
-        with open(output_file, "a", encoding="utf-8") as f:
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                if i == 0:
-                    # Write the MCQuestion class
-                    f.write(
-                        f"class Question{q_value['question number']}(TFQuestion):\n"
-                    )
-                    f.write("    def __init__(self):\n")
-                    f.write("        super().__init__(\n")
-                    f.write(f"            title=f'{q_value['question_text']}',\n")
-                    f.write("            style=TrueFalse_style,\n")
-                    f.write(
-                        f"            question_number={q_value['question number']},\n"
-                    )
-                break
-
-            keys = []
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                # Write keys
-                keys.append(f"q{q_value['subquestion_number']}-{q_value['name']}")
-
-            f.write(f"            keys={keys},\n")
+        # The class header comes from the first question of the set
+        first_question = next(iter(question_dict.values()))
+        question_number = first_question["question number"]
+
+        # Write the MCQuestion class
+        parts.append(
+            f"class Question{question_number}(TFQuestion):\n"
+            "    def __init__(self):\n"
+            "        super().__init__(\n"
+            f"            title=f'{first_question['question_text']}',\n"
+            "            style=TrueFalse_style,\n"
+            f"            question_number={question_number},\n"
+        )
 
-            descriptions = []
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                # Write descriptions
-                descriptions.append(q_value["question_text"])
-            f.write(f"            descriptions={descriptions},\n")
+        # Gather the fields of every question in a single pass
+        keys, descriptions, points = [], [], []
+        for q_value in question_dict.values():
+            keys.append(f"q{q_value['subquestion_number']}-{q_value['name']}")
+            descriptions.append(q_value["question_text"])
+            points.append(q_value["points"])
 
-            points = []
-            for i, (q_key, q_value) in enumerate(question_dict.items()):
-                # Write points
-                points.append(q_value["points"])
+        parts.append(f"            keys={keys},\n")
+        parts.append(f"            descriptions={descriptions},\n")
+        parts.append(f"            points={points},\n")
+        parts.append("        )\n")
 
-            f.write(f"            points={points},\n")
-            f.write("        )\n")
+    # Ensure header lines are present, and append the classes in the same write
+    ensure_imports(output_file, header_lines, "".join(parts))
 
 
 def sanitize_string(input_string):
@@ -1471,7 +1689,7 @@ def sanitize_string(input_string):
         str: A valid Python variable name.
     """
     # Replace invalid characters with underscores
-    sanitized = re.sub(r"\W|^(?=\d)", "_", input_string)
+    sanitized = INVALID_NAME_PATTERN.sub("_", input_string)
     return sanitized
 
 
@@ -1482,9 +1700,18 @@ def main():
     parser.add_argument(
         "root_folder", type=str, help="Path to the root folder to process"
     )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help=(
+            "Number of notebooks to process concurrently; with 1, Otter is run "
+            "in-process when importable instead of as an `otter` command per notebook"
+        ),
+    )
     args = parser.parse_args()
 
-    processor = NotebookProcessor(args.root_folder)
+    processor = NotebookProcessor(args.root_folder, max_workers=args.max_workers)
     processor.process_notebooks()
 
 
@@ -4,7 +4,7 @@ import os
 import panel as pn
 from IPython import get_ipython
 
-from .telemetry import telemetry, update_responses
+from .telemetry import telemetry, update_responses_bulk
 
 
 # TODO: add verbose bool flag, false by default, to enable print statements
@@ -26,11 +26,10 @@ def initialize_assignment(name: str) -> None:
         return
 
     try:
-        update_responses(key="assignment", value=name)
-        update_responses(key="jhub_user", value=jhub_user)
-
         seed = hash(jhub_user) % 1000
-        update_responses(key="seed", value=seed)
+        update_responses_bulk(
+            {"assignment": name, "jhub_user": jhub_user, "seed": seed}
+        )
     except (TypeError, json.JSONDecodeError) as e:
         print(f"Failed to initialize assignment: {e}")
         return
@@ -68,8 +68,12 @@ def telemetry(info: ExecutionInfo) -> None:
 
 
 def update_responses(key: str, value) -> dict:
+    return update_responses_bulk({key: value})
+
+
+def update_responses_bulk(updates: dict) -> dict:
     data = ensure_responses()
-    data[key] = value
+    data.update(updates)
 
     temp_path = ".responses.tmp"
     orig_path = ".responses.json"
@@ -1,16 +1,27 @@
 import random
+from functools import lru_cache
+from operator import attrgetter
 from typing import Tuple
 
 import panel as pn
 
+# Fast accessor for widget values, for use with map()
+get_value = attrgetter("value")
+
+
+@lru_cache(maxsize=512)
+def description_html(desc: str, width: str = "350px") -> str:
+    # Descriptions repeat across question instances, so format each one once
+    return f"<div style='text-align: left; width: {width};'><b>{desc}</b></div>"
+
 
 def list_of_lists(options: list) -> bool:
     return all(isinstance(elem, list) for elem in options)
 
 
 def shuffle_options(options, seed: int):
-    random.seed(seed)
-    random.shuffle(options)
+    # Use a local RNG so the global `random` state is left untouched
+    random.Random(seed).shuffle(options)
 
     return options
 
@@ -20,10 +31,8 @@ def shuffle_questions(
     dropdowns: list[pn.widgets.Select] | list[pn.Column],
     seed: int,
 ) -> list[Tuple[pn.pane.HTML, pn.widgets.Select | pn.Column]]:
-    random.seed(seed)
-
     # Combine widgets into pairs
     widget_pairs = list(zip(desc_widgets, dropdowns))
 
-    random.shuffle(widget_pairs)
+    random.Random(seed).shuffle(widget_pairs)
     return widget_pairs
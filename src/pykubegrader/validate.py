@@ -3,6 +3,7 @@ import json
 import os
 import re
 import sys
+from collections import defaultdict
 from datetime import datetime
 
 import nacl.public
@@ -10,6 +11,13 @@ import numpy as np
 import requests
 from requests.auth import HTTPBasicAuth
 
+#
+# Constants
+#
+
+# Log entries for student info or question responses
+RELEVANT_ENTRY_PATTERN = re.compile(r"info,|q\d+_\d+,")
+
 
 def validate_logfile(
     filepath: str,
@@ -52,11 +60,7 @@ def validate_logfile(
     _loginfo = str(data_)
 
     # Where possible, we should work with this reduced list of relevant entries
-    data_reduced = [
-        entry
-        for entry in data_
-        if re.match(r"info,", entry) or re.match(r"q\d+_\d+,", entry)
-    ]
+    data_reduced = [entry for entry in data_ if RELEVANT_ENTRY_PATTERN.match(entry)]
 
     # For debugging; to be commented out
     with open(".output_reduced.log", "w") as f:
@@ -132,36 +136,19 @@ def validate_logfile(
         print("Writing to info.json")
         json.dump(student_information, file)
 
-    def get_last_entry(data: list[str], field_name: str) -> str:
-        for entry in data[::-1]:
-            parts = [part.strip() for part in entry.split(",")]
-            if parts[0] == field_name:
-                return entry
-        return ""
-
-    def get_entries_len(data: list[str], question_number: int) -> int:
-        """function to get the unique entries by length
-
-        Args:
-            data (list): list of all the data records
-            question_number (int): question number to evaluate
+    # Index the data in a single pass, rather than rescanning it for every
+    # sub-question: the last entry for each field name, and the unique qN_*
+    # sub-question values for each question number
+    last_entries_by_field: dict[str, str] = {}
+    unique_qN_values: defaultdict[str, set[str]] = defaultdict(set)
 
-        Returns:
-            int: length of the unique entries
-        """
+    for entry in data:
+        field_name = entry.split(",")[0].strip()
+        last_entries_by_field[field_name] = entry
 
-        # Set for unique qN_* values
-        unique_qN_values = set()
-
-        for entry in data:
-            if entry.startswith(f"q{question_number}_"):
-                # Split the string by commas and get the value part
-                parts = [part.strip() for part in entry.split(",")]
-                # The value is the third element after splitting (?)
-                value = parts[0].split("_")[1]
-                unique_qN_values.add(value)
-
-        return len(unique_qN_values) + 1
+        if entry.startswith("q") and "_" in field_name:
+            question_number, _, value = field_name[1:].partition("_")
+            unique_qN_values[question_number].add(value.split("_")[0])
 
     # Modified list comprehension to filter as per the criteria
     free_response = [
@@ -180,8 +167,8 @@ def validate_logfile(
         # Collect entries for each question in a list.
         entries = [
             entry
-            for j in range(1, get_entries_len(data, i))
-            if (entry := get_last_entry(data, f"q{i}_{j}")) != ""
+            for j in range(1, len(unique_qN_values.get(str(i), ())) + 1)
+            if (entry := last_entries_by_field.get(f"q{i}_{j}", "")) != ""
         ]
 
         # Store the list of entries in the dictionary, keyed by question number.
@@ -194,10 +181,8 @@ def validate_logfile(
         [part.strip() for part in line.split(",")] for line in q_entries
     ]
 
-    unique_question_IDs = set(row[0] for row in parsed_data)
-
-    # Initialize a dictionary to hold the maximum score for each unique value
-    max_scores = {unique_value: 0 for unique_value in unique_question_IDs}
+    # Maximum score for each unique question ID, starting from 0
+    max_scores: defaultdict[str, int] = defaultdict(int)
 
     # Loop through each row in the data
     for score_entry in parsed_data:
@@ -1,13 +1,6 @@
 # Auto-generated __init__.py
 
-from . import (
-    multiple_choice,
-    reading_question,
-    select_many,
-    student_info,
-    true_false,
-    types_question,
-)
+import importlib
 
 __all__ = [
     "select_many",
@@ -17,3 +10,10 @@ __all__ = [
     "student_info",
     "types_question",
 ]
+
+
+def __getattr__(name):
+    # Import widget modules on first access, so loading one does not load them all
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,9 @@
+from itertools import repeat
 from typing import Tuple
 
 import panel as pn
 
-from ..utils import list_of_lists
+from ..utils import description_html, list_of_lists
 from ..widgets_base.select import SelectQuestion
 
 #
@@ -15,14 +16,7 @@ def MCQ(
     options: list[str] | list[list[str]],
     initial_vals: list[str],
 ) -> Tuple[list[pn.pane.HTML], list[pn.widgets.RadioButtonGroup]]:
-    desc_width = "350px"
-
-    desc_widgets = [
-        pn.pane.HTML(
-            f"<div style='text-align: left; width: {desc_width};'><b>{desc}</b></div>"
-        )
-        for desc in descriptions
-    ]
+    desc_widgets = [pn.pane.HTML(description_html(desc)) for desc in descriptions]
 
     radio_buttons = [
         pn.widgets.RadioBoxGroup(
@@ -31,8 +25,7 @@ def MCQ(
             width=300,
         )
         for value, option in zip(
-            initial_vals,
-            options if list_of_lists(options) else [options] * len(initial_vals),
+            initial_vals, options if list_of_lists(options) else repeat(options)
         )
     ]
 
@@ -1,17 +1,19 @@
 import os
 import re
 import socket
+from functools import lru_cache
 
 import numpy as np
 import panel as pn
 
-from ..telemetry import ensure_responses, update_responses
+from ..telemetry import ensure_responses, update_responses_bulk
 
 #
 # Constants
 #
 
-EMAIL_PATTERN = re.compile(r"[a-z]+\d+@drexel\.edu")
+EMAIL_DOMAIN = "drexel.edu"
+EMAIL_PATTERN = re.compile(r"\A[a-z]+\d+@drexel\.edu\Z", re.ASCII)
 
 KEYS = [
     "first_name",
@@ -24,12 +26,56 @@ KEYS = [
     "seed",
 ]
 
+#
+# Helper functions
+#
+
+
+def valid_email_prefix(email: str) -> str | None:
+    # Cheap domain check first; the anchored regex only runs on plausible input
+    prefix, _, domain = email.partition("@")
+    if domain != EMAIL_DOMAIN or not EMAIL_PATTERN.match(email):
+        return None
+
+    return prefix
+
+
+# Host details don't change during a notebook session, so look them up once
+@lru_cache(maxsize=1)
+def get_hostname() -> str:
+    return socket.gethostname()
+
+
+@lru_cache(maxsize=1)
+def get_ip_address(hostname: str) -> str:
+    try:
+        return socket.gethostbyname(hostname)
+    except socket.gaierror:
+        return "IP unavailable"
+
+
+@lru_cache(maxsize=1)
+def get_jupyter_user() -> str:
+    return os.environ.get("JUPYTERHUB_USER", "Not on JupyterHub")
+
+
 #
 # Form class
 #
 
 
 class StudentInfoForm:
+    __slots__ = (
+        *KEYS,
+        "first_name_widget",
+        "last_name_widget",
+        "drexel_id_widget",
+        "drexel_email_widget",
+        "submit_button",
+        "message",
+        "layout",
+    )
+
     def __init__(self, **kwargs) -> None:
         self.first_name = kwargs.get("first_name", "")
         self.last_name = kwargs.get("last_name", "")
@@ -73,38 +119,37 @@ class StudentInfoForm:
     def submit(self, _) -> None:
         info = ensure_responses()
 
-        info["first_name"] = self.first_name_widget.value.strip()
-        info["last_name"] = self.last_name_widget.value.strip()
-        info["drexel_id"] = self.drexel_id_widget.value.strip()
-        info["drexel_email"] = self.drexel_email_widget.value.strip()
-
-        info["hostname"] = socket.gethostname()
-        info["jupyter_user"] = os.environ.get("JUPYTERHUB_USER", "Not on JupyterHub")
+        hostname = get_hostname()
+        info.update(
+            {
+                "first_name": self.first_name_widget.value.strip(),
+                "last_name": self.last_name_widget.value.strip(),
+                "drexel_id": self.drexel_id_widget.value.strip(),
+                "drexel_email": self.drexel_email_widget.value.strip(),
+                "hostname": hostname,
+                "ip_address": get_ip_address(hostname),
+                "jupyter_user": get_jupyter_user(),
+            }
+        )
 
         if "seed" not in info:
             info["seed"] = np.random.randint(0, 100)
 
         try:
-            info["ip_address"] = socket.gethostbyname(info["hostname"])
-        except socket.gaierror:
-            info["ip_address"] = "IP unavailable"
-
-        try:
-            for key in KEYS:
-                if info[key] == "":
-                    raise ValueError(f"Missing form input: {key}")
+            missing = next((key for key in KEYS if info[key] == ""), None)
+            if missing is not None:
+                raise ValueError(f"Missing form input: {missing}")
 
-            if not EMAIL_PATTERN.fullmatch(info["drexel_email"]):
+            email_prefix = valid_email_prefix(info["drexel_email"])
+            if email_prefix is None:
                 raise ValueError(f"Invalid email format: {info['drexel_email']}")
 
-            email_prefix = info["drexel_email"].split("@")[0]
             if info["drexel_id"] != email_prefix:
                 raise ValueError(
                     f"Drexel ID {info['drexel_id']} does not match email {info['drexel_email']}"
                 )
 
-            for key in KEYS:
-                update_responses(key, info[key])
+            update_responses_bulk({key: info[key] for key in KEYS})
 
             self.message.object = "Student info recorded successfully!"
             self.message.style = {"color": "green"}
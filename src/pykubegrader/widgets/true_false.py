@@ -1,3 +1,4 @@
+from itertools import repeat
 from typing import List, Tuple
 
 import panel as pn
@@ -55,7 +56,7 @@ def TrueFalse_style(
         )
         for value, option in zip(
             initial_vals,
-            options if isinstance(options[0], list) else [options] * len(initial_vals),
+            options if isinstance(options[0], list) else repeat(options),
         )
     ]
 
@@ -3,8 +3,8 @@ from typing import Callable, Tuple
 
 import panel as pn
 
-from ..telemetry import ensure_responses, update_responses
-from ..utils import shuffle_questions
+from ..telemetry import ensure_responses, update_responses_bulk
+from ..utils import get_value, shuffle_questions
 from ..widgets.style import drexel_colors, raw_css
 
 # Pass the custom CSS to Panel
@@ -15,6 +15,19 @@ pn.config.raw_css.append(raw_css)
 
 
 class MultiSelectQuestion:
+    __slots__ = (
+        "checkbox_rows",
+        "initial_vals",
+        "keys",
+        "layout",
+        "points",
+        "question_number",
+        "responses_nested",
+        "style",
+        "submit_button",
+        "widgets",
+    )
+
     def __init__(
         self,
         title: str,
@@ -34,12 +47,12 @@ class MultiSelectQuestion:
         self.question_number = question_number
         self.style = style
 
-        flat_index = 0
-        self.keys: list[str] = []
-        for i, _ in enumerate(keys):
-            for _ in options[i]:
-                flat_index += 1  # Start at 1
-                self.keys.append(f"q{question_number}_{flat_index}")
+        # One key per checkbox, numbered from 1 across all options
+        key_prefix = f"q{question_number}_"
+        n_checkboxes = sum(len(option_set) for option_set in options)
+        self.keys: tuple[str, ...] = tuple(
+            key_prefix + str(flat_index) for flat_index in range(1, n_checkboxes + 1)
+        )
 
         try:
             seed: int = responses["seed"]
@@ -48,16 +61,23 @@ class MultiSelectQuestion:
                 "You must submit your student info before starting the exam"
             )
 
-        # Dynamically assigning attributes based on keys, with default values from responses
-        for key in self.keys:
-            setattr(self, key, responses.get(key, False))
-
-        self.initial_vals = [getattr(self, key) for key in self.keys]
+        # Default values from responses, in key order
+        self.initial_vals = [responses.get(key, False) for key in self.keys]
 
         description_widgets, self.widgets = style(
             descriptions, options, self.initial_vals
         )
 
+        # Checkboxes per question, skipping HTML separators, resolved once up front
+        self.checkbox_rows: list[list[pn.widgets.Checkbox]] = [
+            [
+                widget
+                for widget in row.objects
+                if isinstance(widget, pn.widgets.Checkbox)
+            ]
+            for row in self.widgets
+        ]
+
         self.submit_button = pn.widgets.Button(name="Submit", button_type="primary")
         self.submit_button.on_click(self.submit)
 
@@ -67,39 +87,28 @@ class MultiSelectQuestion:
         question_header = pn.pane.HTML(
             f"<h2>Question {self.question_number}: {title}</h2>"
         )
-        question_body = pn.Column(
-            *[
+        self.layout = pn.Column(
+            question_header,
+            *(
                 pn.Row(desc_widget, checkbox_set)
                 for desc_widget, checkbox_set in widget_pairs
-            ]
+            ),
+            self.submit_button,
         )
 
-        self.layout = pn.Column(question_header, question_body, self.submit_button)
-
     def submit(self, _) -> None:
-        responses_flat: list[bool] = []
-        self.responses_nested: list[list[bool]] = []
-
-        for row in self.widgets:
-            next_selections = []
-
-            for widget in row.objects:
-                # Skip HTML widgets
-                if isinstance(widget, pn.pane.HTML):
-                    continue
-
-                if isinstance(widget, pn.widgets.Checkbox):
-                    next_selections.append(widget.value)
-                    responses_flat.append(widget.value)  # For flat list of responses
+        # Checkbox values per question
+        self.responses_nested: list[list[bool]] = [
+            list(map(get_value, row)) for row in self.checkbox_rows
+        ]
 
-            # Append all responses for this widget at once, forming a list of lists
-            self.responses_nested.append(next_selections)
+        # Flat list of responses, in key order
+        responses_flat = [value for row in self.responses_nested for value in row]
 
         self.record_responses(responses_flat)
 
     def record_responses(self, responses_flat: list[bool]) -> None:
-        for key, value in zip(self.keys, responses_flat):
-            update_responses(key, value)
+        update_responses_bulk(dict(zip(self.keys, responses_flat)))
 
         self.submit_button.name = "Responses Submitted"
         time.sleep(1)
@@ -1,10 +1,9 @@
-import copy
 from typing import Optional
 
 import panel as pn
 
-from ..telemetry import ensure_responses, update_responses
-from ..utils import shuffle_options
+from ..telemetry import ensure_responses, update_responses_bulk
+from ..utils import get_value, shuffle_options
 
 
 class ReadingPython:
@@ -21,19 +20,17 @@ class ReadingPython:
 
         default = None
 
-        # Dynamically assign attributes based on keys, with default values from responses
-        for num in range(len(options["lines_to_comment"]) + options["n_rows"]):
-            key = f"q{question_number}_{num+1}"
-
-            # Dynamically assign the value from the responses file for persistence
-            if num < len(options["lines_to_comment"]):
-                setattr(self, key, responses.get(key, default))
-            else:
-                setattr(
-                    self,
-                    key,
-                    responses.get(key, [default] * (len(options["table_headers"]) - 1)),
-                )
+        n_cols = len(options["table_headers"])
+        n_lines = len(options["lines_to_comment"])
+
+        # Initial values from the responses file for persistence, indexed by key number
+        self.initial_vals: list = [
+            responses.get(
+                f"q{question_number}_{num+1}",
+                default if num < n_lines else [default] * (n_cols - 1),
+            )
+            for num in range(n_lines + options["n_rows"])
+        ]
 
         # Checks that a seed was assigned to responses
         try:
@@ -53,18 +50,19 @@ class ReadingPython:
         # Comment dropdowns
         #
 
+        # Shuffle a copy once; every dropdown shares the same option order
+        comments_options = shuffle_options(list(options["comments_options"]), seed)
+
         self.dropdowns_for_comments: dict[str, pn.widgets.Select] = {
             line: pn.widgets.Select(
-                options=shuffle_options(options["comments_options"], seed),
+                options=comments_options,
                 name=f"Line {line}:",
-                value=getattr(self, f"q{question_number}_{i_comments+1}"),
+                value=self.initial_vals[i_comments],
                 width=600,
             )
             for i_comments, line in enumerate(options["lines_to_comment"])
         }
 
-        comment_dropdowns = pn.Column(*self.dropdowns_for_comments.values())
-
         #
         # Execution dropdowns
         #
@@ -74,60 +72,54 @@ class ReadingPython:
             "<h3>For each step, select the appropriate response:</h3>"
         )
 
-        # Header row
-        header_row = pn.Row(
-            *[
-                pn.pane.HTML(f"<strong>{header}</strong>", width=150)
-                for header in options["table_headers"]
-            ]
-        )
+        self.n_rows = options["n_rows"]
+        self.n_lines = n_lines
+        self.col_width = 150
 
-        # Make a deep copy of the lines to comment and add a null value to the beginning
+        # Header cells
+        header_cells = [
+            pn.pane.HTML(f"<strong>{header}</strong>", width=self.col_width)
+            for header in options["table_headers"]
+        ]
+
+        # Copy the lines to comment with a null value at the beginning
         # This is to provide the null response to the question
-        line_comment: list[int | str] = copy.deepcopy(options["lines_to_comment"])
-        line_comment.insert(0, "")
+        line_comment: list[int | str] = ["", *options["lines_to_comment"]]
 
-        dropdown_options = [
+        # One options list per dropdown column (the first column is the step label)
+        self.dropdown_options = [
             line_comment,
             options["variables_changed"],
             options["current_values"],
             options["datatypes"],
-        ]
+        ][: n_cols - 1]
 
-        # Function to create a row with dropdowns
-        def create_row(step: int) -> pn.Row:
-            widgets_list = [
-                pn.pane.HTML(f"Step {step+1}", width=150)
-                if i == 0
-                else pn.widgets.Select(
-                    options=dropdown_options[i - 1],
-                    value=getattr(
-                        self,
-                        f'q{question_number}_{len(options["lines_to_comment"])+step+1}',
-                    )[i - 1],
-                    width=150,
-                )
-                for i in range(len(options["table_headers"]))
-            ]
-
-            return pn.Row(*widgets_list)
+        # Lay out the header and all rows in one grid, rather than a Row per step
+        self.execution_steps = pn.GridBox(*header_cells, ncols=n_cols)
 
-        # Generate rows dynamically based on n_rows
-        self.rows = [create_row(step) for step in range(options["n_rows"])]
+        # Rows are built on demand: every saved row plus one blank row to start,
+        # and answering the last row reveals the next one
+        saved_rows = sum(
+            1
+            for row_values in self.initial_vals[n_lines:]
+            if not all(value in (None, "") for value in row_values)
+        )
 
-        # Combine header and rows
-        execution_steps = pn.Column(header_row, *self.rows)
+        # Dropdowns of each visible row, without the step labels
+        self.rows: list[list[pn.widgets.Select]] = []
+        for _ in range(min(saved_rows + 1, self.n_rows)):
+            self.add_row()
 
         # Submit button
         self.submit_button = pn.widgets.Button(name="Submit")
         self.submit_button.on_click(self.submit)
 
-        # Combine everything into a single layout
+        # Combine everything into a single flat layout
         self.layout = pn.Column(
             question_title,
-            comment_dropdowns,
+            *self.dropdowns_for_comments.values(),
             execution_instructions,
-            execution_steps,
+            self.execution_steps,
             self.submit_button,
         )
 
@@ -140,29 +132,54 @@ class ReadingPython:
         # Get section 2 responses
         self.output_execution: list[list[Optional[str | int]]] = []
 
-        for row in self.rows[:]:
-            row_value: list[Optional[str | int]] = []
+        for row in self.rows:
+            row_value: list[Optional[str | int]] = list(map(get_value, row))
 
-            for box in row.objects:
-                if isinstance(box, pn.widgets.Select):
-                    row_value.append(box.value)
-
-            if not any(row_value):
+            # Skip rows left entirely at the null response
+            if all(value in (None, "") for value in row_value):
                 continue
 
             self.output_execution.append(row_value)
 
-        # Persist responses to JSON
-        i = 0
-        for comment_val in self.output_comments:
-            i += 1
-            update_responses(f"q{self.question_number}_{i}", comment_val)
-
-        for exec_val in self.output_execution:
-            i += 1
-            update_responses(f"q{self.question_number}_{i}", exec_val)
+        # Persist responses to JSON in a single write
+        update_responses_bulk(
+            {
+                f"q{self.question_number}_{i}": value
+                for i, value in enumerate(
+                    [*self.output_comments, *self.output_execution], start=1
+                )
+            }
+        )
 
         print("Responses recorded successfully")
 
+    def add_row(self) -> None:
+        step = len(self.rows)
+        row_values = self.initial_vals[self.n_lines + step]
+
+        row = [
+            pn.widgets.Select(
+                options=column_options, value=row_values[i], width=self.col_width
+            )
+            for i, column_options in enumerate(self.dropdown_options)
+        ]
+
+        self.rows.append(row)
+        self.execution_steps.extend(
+            [pn.pane.HTML(f"Step {step+1}", width=self.col_width), *row]
+        )
+
+        if step + 1 < self.n_rows:
+            for box in row:
+                box.param.watch(self.reveal_next_row, "value")
+
+    def reveal_next_row(self, event) -> None:
+        # Only an answer in the last visible row reveals another one
+        if len(self.rows) >= self.n_rows or event.new in (None, ""):
+            return
+
+        if any(box is event.obj for box in self.rows[-1]):
+            self.add_row()
+
     def show(self):
         return self.layout
@@ -3,8 +3,8 @@ from typing import Callable, Tuple
 
 import panel as pn
 
-from ..telemetry import ensure_responses, update_responses
-from ..utils import shuffle_questions
+from ..telemetry import ensure_responses, update_responses_bulk
+from ..utils import get_value, shuffle_questions
 from ..widgets.style import drexel_colors
 
 # Pass the custom CSS to Panel
@@ -55,21 +55,19 @@ class SelectQuestion:
         self.layout = pn.Column(
             f"# Question {self.question_number}: {title}",
             *(
-                pn.Column(desc_widget, pn.Row(dropdown))
+                pn.Column(desc_widget, dropdown)
                 for desc_widget, dropdown in widget_pairs
             ),
             self.submit_button,
         )
 
     def submit(self, _) -> None:
-        selections = {key: widget.value for key, widget in zip(self.keys, self.widgets)}
+        values = list(map(get_value, self.widgets))
 
-        for value in selections.values():
-            if value is None:
-                raise ValueError("Please answer all questions before submitting")
+        if None in values:
+            raise ValueError("Please answer all questions before submitting")
 
-        for key, value in selections.items():
-            update_responses(key, value)
+        update_responses_bulk(dict(zip(self.keys, values)))
 
         self.submit_button.name = "Responses Submitted"
         time.sleep(1)
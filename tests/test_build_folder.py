@@ -0,0 +1,265 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+from pykubegrader.build import build_folder
+from pykubegrader.build.build_folder import (
+    NotebookProcessor,
+    clean_notebook,
+    load_notebook,
+    logger,
+    save_notebook,
+)
+
+
+def write_notebook(path, cells, nbformat_minor=5, **dump_kwargs):
+    notebook = {
+        "cells": cells,
+        "metadata": {},
+        "nbformat": 4,
+        "nbformat_minor": nbformat_minor,
+    }
+    path.write_text(json.dumps(notebook, **dump_kwargs), encoding="utf-8")
+
+
+def read_cells(path):
+    return json.loads(path.read_text(encoding="utf-8"))["cells"]
+
+
+def test_clean_notebook_locks_markdown_cells(tmp_path):
+    path = tmp_path / "nb.ipynb"
+    write_notebook(
+        path, [{"cell_type": "markdown", "metadata": {}, "source": ["# Hi"]}]
+    )
+
+    clean_notebook(path)
+
+    (cell,) = read_cells(path)
+    assert cell["metadata"]["editable"] is False
+    assert cell["metadata"]["deletable"] is False
+
+
+def test_clean_notebook_tags_code_cells_skip_execution(tmp_path):
+    path = tmp_path / "nb.ipynb"
+    write_notebook(
+        path,
+        [
+            {
+                "cell_type": "code",
+                "metadata": {"tags": ["keep"]},
+                "source": ["x = 1"],
+                "outputs": [],
+                "execution_count": None,
+            }
+        ],
+    )
+
+    clean_notebook(path)
+
+    (cell,) = read_cells(path)
+    assert cell["metadata"]["tags"] == ["keep", "skip-execution"]
+
+
+def test_clean_notebook_removes_marker_cells(tmp_path):
+    path = tmp_path / "nb.ipynb"
+    write_notebook(
+        path,
+        [
+            {"cell_type": "markdown", "metadata": {}, "source": ["## Submission\n"]},
+            {
+                "cell_type": "code",
+                "metadata": {},
+                "source": ["# Save your notebook first, then run this cell\n"],
+                "outputs": [],
+                "execution_count": None,
+            },
+            {"cell_type": "markdown", "metadata": {}, "source": ["Kept"]},
+        ],
+    )
+
+    clean_notebook(path)
+
+    assert [cell["source"] for cell in read_cells(path)] == [["Kept"]]
+
+
+def test_clean_notebook_adds_ids_from_nbformat_4_5(tmp_path):
+    path = tmp_path / "nb.ipynb"
+    write_notebook(path, [{"cell_type": "markdown", "metadata": {}, "source": ["a"]}])
+
+    clean_notebook(path)
+
+    (cell,) = read_cells(path)
+    assert len(cell["id"]) == 8
+
+
+def test_clean_notebook_does_not_add_ids_before_nbformat_4_5(tmp_path):
+    path = tmp_path / "nb.ipynb"
+    write_notebook(
+        path,
+        [{"cell_type": "markdown", "metadata": {}, "source": ["a"]}],
+        nbformat_minor=4,
+    )
+
+    clean_notebook(path)
+
+    (cell,) = read_cells(path)
+    assert "id" not in cell
+
+
+def test_clean_notebook_clears_outputs(tmp_path):
+    path = tmp_path / "nb.ipynb"
+    write_notebook(
+        path,
+        [
+            {
+                "cell_type": "code",
+                "metadata": {},
+                "source": ["print(1)"],
+                "outputs": [{"output_type": "stream", "name": "stdout", "text": ["1"]}],
+                "execution_count": 3,
+            }
+        ],
+    )
+
+    clean_notebook(path)
+
+    (cell,) = read_cells(path)
+    assert cell["outputs"] == []
+    assert cell["execution_count"] is None
+
+
+def test_clean_notebook_does_not_rewrite_clean_notebook(tmp_path):
+    path = tmp_path / "nb.ipynb"
+    # A layout clean_notebook would never write, so any rewrite shows
+    write_notebook(
+        path,
+        [
+            {
+                "id": "abcd1234",
+                "cell_type": "markdown",
+                "metadata": {"editable": False, "deletable": False},
+                "source": ["a"],
+            },
+            {
+                "id": "abcd5678",
+                "cell_type": "code",
+                "metadata": {"tags": ["skip-execution"]},
+                "source": ["x = 1"],
+                "outputs": [],
+                "execution_count": None,
+            },
+        ],
+        indent=4,
+    )
+    before = path.read_bytes()
+
+    clean_notebook(path)
+
+    assert path.read_bytes() == before
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_save_notebook_round_trips_non_ascii(tmp_path, monkeypatch, use_orjson):
+    if use_orjson and build_folder.orjson is None:
+        pytest.skip("orjson is not installed")
+    if not use_orjson:
+        monkeypatch.setattr(build_folder, "orjson", None)
+    path = tmp_path / "nb.ipynb"
+    notebook = {
+        "cells": [{"cell_type": "markdown", "metadata": {}, "source": ["é π ✓"]}],
+        "metadata": {},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+
+    save_notebook(notebook, path)
+
+    assert load_notebook(path) == notebook
+    text = path.read_text(encoding="utf-8")
+    assert "é π ✓" in text
+    assert "\\u" not in text
+
+
+def raw_cell(source):
+    return {"cell_type": "raw", "metadata": {}, "source": source.splitlines(True)}
+
+
+def markdown_cell(source):
+    return {"cell_type": "markdown", "metadata": {}, "source": source.splitlines(True)}
+
+
+MULTIPLE_CHOICE_CELLS = [
+    raw_cell("# BEGIN MULTIPLE CHOICE\n## question number: 1\n## points: 2\n"),
+    markdown_cell(
+        "## q1a\n### **What is 2+2?**\n#### options\n3\n4\n#### SOLUTION\n4\n"
+    ),
+    markdown_cell(
+        "## q1b\n### **What is 3+3?**\n#### options\n6\n7\n#### SOLUTION\n6\n"
+    ),
+    raw_cell("# END MULTIPLE CHOICE\n"),
+]
+
+
+def test_same_named_notebooks_are_processed_serially(tmp_path, monkeypatch):
+    notebook_paths = []
+    for folder, name in (("a", "hw1"), ("b", "hw1"), ("c", "hw2")):
+        (tmp_path / folder).mkdir()
+        notebook_path = tmp_path / folder / f"{name}.ipynb"
+        write_notebook(notebook_path, [raw_cell("# ASSIGNMENT CONFIG\n")])
+        notebook_paths.append(str(notebook_path))
+
+    lock = threading.Lock()
+    active = set()
+    overlaps = []
+    processed = []
+
+    def process_single_notebook(self, notebook_path):
+        name = os.path.basename(notebook_path)
+        with lock:
+            if name in active:
+                overlaps.append(name)
+            active.add(name)
+        time.sleep(0.05)
+        with lock:
+            active.discard(name)
+            processed.append(notebook_path)
+
+    monkeypatch.setattr(
+        NotebookProcessor, "_process_single_notebook", process_single_notebook
+    )
+
+    NotebookProcessor(str(tmp_path), max_workers=4).process_notebooks()
+
+    assert overlaps == []
+    assert sorted(processed) == sorted(notebook_paths)
+
+
+def test_same_named_notebooks_build_one_consistent_output(tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        write_notebook(tmp_path / folder / "hw1.ipynb", MULTIPLE_CHOICE_CELLS)
+
+    NotebookProcessor(str(tmp_path), max_workers=4).process_notebooks()
+
+    solutions = tmp_path / "_solutions" / "hw1" / "dist" / "autograder" / "hw1.py"
+    assert "total_points: float = 4.0\n" in solutions.read_text(encoding="utf-8")
+    assert (tmp_path / "hw1.ipynb").is_file()
+    assert (tmp_path / "questions" / "hw1.py").is_file()
+
+
+def test_processor_keeps_other_log_handlers(tmp_path):
+    handler = logging.NullHandler()
+    logger.addHandler(handler)
+    try:
+        first = NotebookProcessor(str(tmp_path / "first"))
+        second = NotebookProcessor(str(tmp_path / "second"))
+
+        assert handler in logger.handlers
+        assert second.log_handler in logger.handlers
+        assert first.log_handler not in logger.handlers
+    finally:
+        logger.removeHandler(handler)